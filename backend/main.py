@@ -1,12 +1,25 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
 from datetime import datetime
 import numpy as np
 from typing import List, Tuple, Dict
-from simulation import SimulationConfig, FireSimulation
+from simulation import SimulationConfig, FireSimulation, close_http_client, start_hysplit_pool, shutdown_hysplit_pool
 
-app = FastAPI(title="PWWB Fire Simulation API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    start_hysplit_pool()
+    yield
+    await close_http_client()
+    shutdown_hysplit_pool()
+
+app = FastAPI(
+    title="PWWB Fire Simulation API",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
+)
 
 # Configure CORS
 app.add_middleware(
@@ -33,7 +46,9 @@ class SimulationResponse(BaseModel):
     simulation_data: List[dict]
     message: str
 
-@app.post("/api/simulate", response_model=SimulationResponse)
+# SimulationResponse documents the payload only; the endpoint returns an ORJSONResponse
+# directly so the large GeoJSON output isn't re-validated by Pydantic
+@app.post("/api/simulate", response_model=None, responses={200: {"model": SimulationResponse}})
 async def run_simulation(req: SimulationRequest):
     try:
         config = SimulationConfig(
@@ -48,10 +63,12 @@ async def run_simulation(req: SimulationRequest):
         simulation = FireSimulation(config)
         simulation_data = await simulation.run_simulation()
         
-        return SimulationResponse(
-            simulation_data=simulation_data,
-            message="Simulation completed successfully"
-        )
+        # Return the response directly so orjson can serialize the NumPy
+        # perimeter arrays without converting them to Python lists first
+        return ORJSONResponse({
+            "simulation_data": simulation_data,
+            "message": "Simulation completed successfully"
+        })
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
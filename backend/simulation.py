@@ -1,15 +1,220 @@
 from datetime import datetime, timedelta
+import asyncio
+import concurrent.futures
+import math
+import multiprocessing
 import numpy as np
 from typing import List, Tuple, Dict
-import xarray as xr
-import requests
-import json
+import httpx
 import os
+import re
+import shutil
+import tempfile
+import diskcache
 from dataclasses import dataclass
-from bs4 import BeautifulSoup
+from numba import njit
 from models import WindVector
 from hysplitdata_module import HYSPLITData
 
+@njit(cache=True, fastmath=True)
+def _advance_perimeter(pts, wind_x, wind_y, spread_distance, out):
+    """
+    Advance every vertex of an open (N, 2) perimeter by one timestep, writing into out
+    """
+    n = pts.shape[0]
+
+    # The edge into vertex j is the edge out of vertex j-1, so each edge is normalized
+    # once and carried to the next vertex; start with the closing edge into vertex 0
+    v2x = pts[0, 0] - pts[n - 1, 0]
+    v2y = pts[0, 1] - pts[n - 1, 1]
+    v2_length = math.sqrt(v2x * v2x + v2y * v2y)
+    if v2_length > 1e-10:
+        v2x /= v2_length
+        v2y /= v2_length
+    else:
+        v2x = 0.0
+        v2y = 0.0
+
+    for j in range(n):
+        nxt = j + 1 if j + 1 < n else 0
+
+        # Calculate and safely normalize the edge to the next vertex
+        v1x = pts[nxt, 0] - pts[j, 0]
+        v1y = pts[nxt, 1] - pts[j, 1]
+        v1_length = math.sqrt(v1x * v1x + v1y * v1y)
+        if v1_length > 1e-10:
+            v1x /= v1_length
+            v1y /= v1_length
+        else:
+            v1x = 0.0
+            v1y = 0.0
+
+        # Calculate normal vector (average of perpendicular vectors)
+        nx = -v1y - v2y
+        ny = v1x + v2x
+        normal_length = math.sqrt(nx * nx + ny * ny)
+        if normal_length > 1e-10:
+            nx /= normal_length
+            ny /= normal_length
+        else:
+            # If normal is too small, use a default direction based on wind
+            nx = wind_x
+            ny = wind_y
+
+        # Calculate spread direction (combine normal with wind direction)
+        sx = nx * 0.5 + wind_x * 0.5
+        sy = ny * 0.5 + wind_y * 0.5
+        spread_length = math.sqrt(sx * sx + sy * sy)
+        if spread_length > 1e-10:
+            sx /= spread_length
+            sy /= spread_length
+        else:
+            sx = wind_x  # Fallback to wind direction
+            sy = wind_y
+
+        out[j, 0] = pts[j, 0] + sx * spread_distance
+        out[j, 1] = pts[j, 1] + sy * spread_distance
+
+        # This vertex's outgoing edge is the next vertex's incoming edge
+        v2x = v1x
+        v2y = v1y
+
+# Compile (or load from cache) at import so the first request doesn't pay for it
+_advance_perimeter(np.zeros((1, 2)), 1.0, 0.0, 0.0, np.empty((1, 2)))
+
+# Compass point -> degrees for NOAA wind directions
+_DIR_DEGREES = {
+    "": 0, "N": 0, "NNE": 22.5, "NE": 45, "ENE": 67.5, "E": 90, "ESE": 112.5, "SE": 135, "SSE": 157.5,
+    "S": 180, "SSW": 202.5, "SW": 225, "WSW": 247.5, "W": 270, "WNW": 292.5, "NW": 315, "NNW": 337.5
+}
+
+def _pack_direction(direction: str) -> int:
+    """
+    Pack the (at most three) ASCII bytes of a compass point into one integer
+    """
+    encoded = direction.encode()
+    if len(encoded) > 3:
+        raise ValueError(f"Unknown wind direction {direction!r} in NOAA forecast")
+    return int.from_bytes(encoded.ljust(3, b"\0"), "little")
+
+def _hash_direction(packed):
+    """
+    Perfect hash of packed compass points into [0, 64); works on ints and uint32 arrays
+    """
+    return (packed ^ (packed >> 4) ^ (packed >> 16)) & 63
+
+# Dense lookup tables indexed by the direction hash; _DIR_PACKED detects unknown keys
+_DIR_PACKED = np.zeros(64, dtype=np.uint32)
+_DIR_TABLE = np.zeros(64, dtype=np.float64)
+for _key, _degrees in _DIR_DEGREES.items():
+    _packed = _pack_direction(_key)
+    _DIR_PACKED[_hash_direction(_packed)] = _packed
+    _DIR_TABLE[_hash_direction(_packed)] = _degrees
+if len({_hash_direction(_pack_direction(k)) for k in _DIR_DEGREES}) != len(_DIR_DEGREES):
+    raise RuntimeError("Wind direction hash has collisions")
+
+def _decode_wind_directions(directions) -> np.ndarray:
+    """
+    Convert NOAA compass point strings to degrees, rejecting unknown directions
+    """
+    packed = np.fromiter((_pack_direction(d) for d in directions), dtype=np.uint32)
+    slots = _hash_direction(packed)
+    if np.any(_DIR_PACKED[slots] != packed):
+        raise ValueError("Unknown wind direction in NOAA forecast")
+    return _DIR_TABLE[slots]
+
+# On-disk cache for NOAA API responses, shared across requests and workers
+_cache = diskcache.Cache(os.path.abspath("./.hrrr_cache"))
+
+# Shared async HTTP client so NOAA requests don't block the event loop
+_client = httpx.AsyncClient(timeout=10, http2=True)
+
+# HYSPLIT runs (external model + cdump interpolation) are blocking and CPU-heavy,
+# so they go to worker processes instead of the event loop (see start_hysplit_pool)
+_pool = None
+
+async def close_http_client():
+    """
+    Close the shared HTTP client (call on application shutdown)
+    """
+    await _client.aclose()
+
+def start_hysplit_pool():
+    """
+    Start the HYSPLIT worker processes (call on application startup)
+
+    Workers come from a forkserver rather than fork, since by the time a request
+    submits work the server has live threads. The pool is kept small by default
+    since each uvicorn worker gets its own; override with HYSPLIT_WORKERS
+    """
+    global _pool
+    _pool = concurrent.futures.ProcessPoolExecutor(
+        max_workers=int(os.environ.get("HYSPLIT_WORKERS", "2")),
+        mp_context=multiprocessing.get_context("forkserver")
+    )
+
+def shutdown_hysplit_pool():
+    """
+    Shut down the HYSPLIT worker processes (call on application shutdown)
+    """
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(cancel_futures=True)
+        _pool = None
+
+def _run_isolated_hysplit(start_location, start_date, end_date, extent, base_dir, met_dir, met_file):
+    """
+    Run HYSPLITData in a private scratch directory (executed in a worker process)
+
+    HYSPLITData writes CONTROL/ASCDATA.CFG into its working directory and collects every
+    cdump file from its output directory, so concurrent runs must not share either
+    """
+    original_dir = os.getcwd()
+    work_dir = tempfile.mkdtemp(prefix="hysplit_")
+    try:
+        # CONTROL points HYSPLIT at the met file inside the working directory
+        os.symlink(os.path.join(met_dir, met_file), os.path.join(work_dir, met_file))
+        hysplit_data = HYSPLITData(
+            start_location,
+            start_date,
+            end_date,
+            extent,
+            base_dir,
+            work_dir,
+            os.path.join(base_dir, "exec"),
+            os.path.join(base_dir, "bdyfiles"),
+            os.path.join(work_dir, "output"),
+            met_file
+        )
+
+        # TODO: Reduce hysplit_data.data to the smoke plume polygons here, so only those
+        # cross the process boundary rather than the full (multi-MB) concentration grids
+        return None
+    finally:
+        # HYSPLITData chdirs into the working directory and may not restore it on error
+        os.chdir(original_dir)
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+def _max_age(response, default: int) -> int:
+    """
+    Get the cache lifetime in seconds from the response's Cache-Control header
+    """
+    match = re.search(r"max-age=(\d+)", response.headers.get("Cache-Control", ""))
+    return int(match.group(1)) if match else default
+
+async def _cached_get_json(url: str, key, expire: int) -> Dict:
+    """
+    GET a JSON document, serving it from the disk cache while still fresh
+    """
+    # diskcache does blocking SQLite/file I/O, so keep it off the event loop
+    data = await asyncio.to_thread(_cache.get, key)
+    if data is None:
+        response = await _client.get(url, follow_redirects=True)
+        response.raise_for_status()
+        data = response.json()
+        await asyncio.to_thread(_cache.set, key, data, expire=_max_age(response, expire))
+    return data
+
 @dataclass
 class SimulationConfig:
     start_location: Tuple[float, float]  # [lon, lat]
@@ -25,73 +230,53 @@ class FireSimulation:
         self.hrrr_data = None
         self.hysplit_data = None
 
-    async def fetch_hrrr_data(self):
+    async def fetch_forecast_url(self) -> str:
         """
-        Fetch HRRR meteorological data
+        Look up the hourly forecast URL for the start location
         """
-        lat = self.config.start_location[1]
-        lon = self.config.start_location[0]
+        # Round to ~1km so nearby runs share the points lookup and its cache entry
+        lat = round(self.config.start_location[1], 2)
+        lon = round(self.config.start_location[0], 2)
         url = f"https://api.weather.gov/points/{lat},{lon}"
 
-        response = requests.get(url)
-        response.raise_for_status()
-        data = response.json()
-        forecast_url = data["properties"]["forecastHourly"]
-        forecast_response = requests.get(forecast_url)
-        forecast_response.raise_for_status()
-        forecast_data = forecast_response.json()
-
-        wind_speed = []
-        wind_direction = []
-        temperature = []
-        humidity = []
-
-        for period in forecast_data["properties"]["periods"]:
-            wind_speed.append(period["windSpeed"])
-            wind_direction.append(period["windDirection"])
-            temperature.append(period["temperature"])
-            humidity.append(period["relativeHumidity"])
-
-        for i in range(len(wind_speed)):
-            wind_speed[i] = float(wind_speed[i][:-4])
-
-        direction_map = {
-            "": 0,
-            "N": 0,
-            "NNE": 22.5,
-            "NE": 45,
-            "ENE": 67.5,
-            "E": 90,
-            "ESE": 112.5,
-            "SE": 135,
-            "SSE": 157.5,
-            "S": 180,
-            "SSW": 202.5,
-            "SW": 225,
-            "WSW": 247.5,
-            "W": 270,
-            "WNW": 292.5,
-            "NW": 315,
-            "NNW": 337.5
-        }
-        for i in range(len(wind_direction)):
-            wind_direction[i] = direction_map[wind_direction[i]]
+        # Gridpoint metadata rarely changes
+        data = await _cached_get_json(url, ("points", lat, lon), expire=3600)
+        return data["properties"]["forecastHourly"]
+
+    async def fetch_hrrr_data(self, forecast_url: str = None):
+        """
+        Fetch HRRR meteorological data
+        """
+        if forecast_url is None:
+            forecast_url = await self.fetch_forecast_url()
 
-        for i in range(len(humidity)):
-            humidity[i] = humidity[i]["value"]
+        # Forecasts refresh roughly hourly
+        forecast_data = await _cached_get_json(forecast_url, ("forecast", forecast_url), expire=1800)
+
+        periods = forecast_data["properties"]["periods"]
+        n = len(periods)
+
+        # Parse every field in a single pass over the forecast periods
+        wind_speed = np.fromiter((float(p["windSpeed"][:-4]) for p in periods), dtype=np.float64, count=n)
+        wind_direction = _decode_wind_directions([p["windDirection"] for p in periods])
+        temperature = np.fromiter((p["temperature"] for p in periods), dtype=np.float64, count=n)
+        humidity = np.fromiter((p["relativeHumidity"]["value"] for p in periods), dtype=np.float64, count=n)
 
         self.hrrr_data = {
-            "times": [datetime.fromisoformat(period["startTime"]) for period in forecast_data["properties"]["periods"]],
+            "times": [datetime.fromisoformat(period["startTime"]) for period in periods],
             "wind_speed": wind_speed,
             "wind_direction": wind_direction,
             "temperature": temperature,
             "humidity": humidity
         }
 
-    async def run_hysplit(self):
+    async def _prepare_hysplit(self):
         """
-        Run the HYSPLIT simulation
+        Set up and run the HYSPLIT model in a worker process (independent of the HRRR data)
         """
+        if _pool is None:
+            raise RuntimeError("HYSPLIT worker pool is not running; call start_hysplit_pool() first")
+
         # Get the extend box for the LA County area
         lat_bottom, lat_top = 33.9, 34.2
         lon_bottom, lon_top = -118.4, -118.0
@@ -100,143 +285,115 @@ class FireSimulation:
         # Get HYSPLIT base directory
         base_dir = os.path.abspath("./hysplit")
 
-        # Setup the hysplit simulation with the HYSPLITData class
-        hysplit_data = HYSPLITData(
+        # Setup the hysplit simulation with the HYSPLITData class in its own scratch directory
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            _pool,
+            _run_isolated_hysplit,
             self.config.start_location,
             self.config.start_time.strftime("%Y-%m-%d-%H"),
             (self.config.start_time + timedelta(hours=self.config.duration_hours)).strftime("%Y-%m-%d-%H"),
             extent,
             base_dir,
             os.path.abspath("."),
-            os.path.join(base_dir, "exec"),
-            os.path.join(base_dir, "bdyfiles"),
-            os.path.join(base_dir, "output"),
             "gdas1.jan25.w2" # TODO: Make this live data
         )
 
-        print(hysplit_data.data)
-
-        # TODO: Return the smallest polygon that encloses the points
+    def _finalize_hysplit(self, hysplit_plumes):
+        """
+        Build the per-timestep smoke plumes from the HYSPLIT output
+        """
+        # TODO: Use the smallest polygon that encloses the points (hysplit_plumes)
 
         # filler data
-        self.hysplit_data = []
-        for i in range(len(self.hrrr_data['times'])):
-            self.hysplit_data.append({
-                "coordinates": self.config.initial_polygon
-            })
+        self.hysplit_data = [
+            {"coordinates": self.config.initial_polygon}
+            for _ in range(len(self.hrrr_data['times']))
+        ]
 
-    def calculate_fire_spread(self) -> List[Dict]:
+    def calculate_fire_spread(self) -> np.ndarray:
         """
         Calculate fire spread based on weather conditions and terrain
+
+        Returns a (T, N, 2) array holding the open fire perimeter at each timestep
         """
         if not self.hrrr_data:
-            return []
+            return np.empty((0, 0, 2), dtype=np.float64)
 
-        spread_data = []
-        
         # Use initial polygon if provided, otherwise use a point-based spread
-        initial_coords = (
+        initial_coords = np.asarray(
             self.config.initial_polygon 
             if self.config.initial_polygon 
-            else [[self.config.start_location[0], self.config.start_location[1]]]
+            else [self.config.start_location],
+            dtype=np.float64
         )
-        
-        for i, time in enumerate(self.hrrr_data['times']):
-            wind_speed = self.hrrr_data['wind_speed'][i]
-            wind_dir = np.radians(self.hrrr_data['wind_direction'][i])
-            temp = self.hrrr_data['temperature'][i]
-            humidity = self.hrrr_data['humidity'][i]
-            
-            # Calculate spread rate based on conditions
-            # Increase the influence of wind speed on spread rate
-            base_spread = 0.002 * (1 + wind_speed/5) * (1 + (30-humidity)/50)
-            
+        perims = np.empty((len(self.hrrr_data['times']), len(initial_coords), 2), dtype=np.float64)
+
+        # Precompute the per-timestep weather terms for the whole forecast at once
+        wind_speed = np.asarray(self.hrrr_data['wind_speed'], dtype=np.float64)
+        wind_dir = np.radians(np.asarray(self.hrrr_data['wind_direction'], dtype=np.float64))
+        humidity = np.asarray(self.hrrr_data['humidity'], dtype=np.float64)
+        cos_wd = np.cos(wind_dir)
+        sin_wd = np.sin(wind_dir)
+
+        # Calculate spread rate based on conditions
+        # Increase the influence of wind speed on spread rate
+        base_spread = 0.002 * (1 + wind_speed/5) * (1 + (30-humidity)/50)
+        spread_distance = np.minimum(base_spread * (1 + wind_speed * 0.2), 0.1)  # Wind affects spread rate
+
+        for i in range(len(perims)):
             if i == 0 and self.config.initial_polygon:
                 # For the first timestep, use the initial polygon
-                perimeter = initial_coords + [initial_coords[0]]  # Close the polygon
+                perims[0] = initial_coords
             else:
                 # For subsequent timesteps or if no initial polygon, calculate spread
                 # Create expanded perimeter based on previous perimeter or initial point
-                prev_coords = spread_data[i-1]['coordinates'][0][:-1] if i > 0 else initial_coords
-                perimeter = []
-                
-                for j, point in enumerate(prev_coords):
-                    # Calculate the normal vector for this point
-                    next_point = prev_coords[(j + 1) % len(prev_coords)]
-                    prev_point = prev_coords[(j - 1) % len(prev_coords)]
-                    
-                    # Calculate vectors
-                    v1 = np.array([next_point[0] - point[0], next_point[1] - point[1]])
-                    v2 = np.array([point[0] - prev_point[0], point[1] - prev_point[1]])
-                    
-                    # Safely normalize vectors
-                    v1_norm = np.zeros(2)
-                    v2_norm = np.zeros(2)
-                    
-                    v1_length = np.linalg.norm(v1)
-                    v2_length = np.linalg.norm(v2)
-                    
-                    if v1_length > 1e-10:  # Check if vector is not too close to zero
-                        v1_norm = v1 / v1_length
-                    if v2_length > 1e-10:
-                        v2_norm = v2 / v2_length
-                    
-                    # Calculate normal vector (average of perpendicular vectors)
-                    normal = np.array([-v1_norm[1] + -v2_norm[1], v1_norm[0] + v2_norm[0]])
-                    normal_length = np.linalg.norm(normal)
-                    
-                    if normal_length > 1e-10:
-                        normal = normal / normal_length
-                    else:
-                        # If normal is too small, use a default direction based on wind
-                        normal = np.array([np.cos(wind_dir), np.sin(wind_dir)])
-                    
-                    # Calculate spread direction (combine normal with wind direction)
-                    wind_vector = np.array([np.cos(wind_dir), np.sin(wind_dir)])
-                    # Increase wind influence on spread direction
-                    spread_dir = normal * 0.5 + wind_vector * 0.5  # More wind influence
-                    spread_length = np.linalg.norm(spread_dir)
-                    
-                    if spread_length > 1e-10:
-                        spread_dir = spread_dir / spread_length
-                    else:
-                        spread_dir = wind_vector  # Fallback to wind direction
-                    
-                    # Calculate new point position with wind speed influence
-                    spread_distance = min(base_spread * (1 + wind_speed * 0.2), 0.1)  # Wind affects spread rate
-                    new_point = [
-                        float(point[0] + spread_dir[0] * spread_distance),  # Ensure float type
-                        float(point[1] + spread_dir[1] * spread_distance)   # Ensure float type
-                    ]
-                    perimeter.append(new_point)
-                
-                # Close the polygon
-                perimeter.append(perimeter[0])
-            
-            spread_data.append({
-                'timestamp': time.isoformat(),
-                'coordinates': [perimeter]
-            })
-        
-        return spread_data
+                prev_coords = perims[i-1] if i > 0 else initial_coords
+                if abs(spread_distance[i]) < 1e-9:
+                    # Negligible spread (calm or very humid), keep the previous perimeter
+                    perims[i] = prev_coords
+                else:
+                    _advance_perimeter(prev_coords, cos_wd[i], sin_wd[i], spread_distance[i], perims[i])
+
+        return perims
 
     async def run_simulation(self) -> List[Dict]:
         """
         Run the complete fire spread and smoke dispersion simulation
         """
-        await self.fetch_hrrr_data()
-        await self.run_hysplit()
+        # Resolve the (cached) points lookup first so locations NOAA rejects fail
+        # before they take up a HYSPLIT worker
+        forecast_url = await self.fetch_forecast_url()
+
+        # HYSPLIT setup doesn't need the weather data, so overlap it with the forecast fetch
+        hysplit_task = asyncio.create_task(self._prepare_hysplit())
+        try:
+            await self.fetch_hrrr_data(forecast_url)
+        except BaseException:
+            # Don't leave HYSPLIT queued (or its result unretrieved) for a failed request
+            hysplit_task.cancel()
+            await asyncio.gather(hysplit_task, return_exceptions=True)
+            raise
+        self._finalize_hysplit(await hysplit_task)
         fire_spread = self.calculate_fire_spread()
-        
+
+        # Close every perimeter ring in one pass; each timestep emits a (1, N+1, 2) view.
+        # The spread math runs in float64, but float32 (~1m at these longitudes) is
+        # plenty for the response and halves the serialized payload
+        fire_rings = np.concatenate([fire_spread, fire_spread[:, :1]], axis=1, dtype=np.float32)
+
+        # Format each timestep once up front
+        timestamps = [time.isoformat() for time in self.hrrr_data['times']]
+
         simulation_data = []
-        for i, time in enumerate(self.hrrr_data['times']):
+        for i, timestamp in enumerate(timestamps):
             simulation_data.append({
-                'timestamp': time.isoformat(),
+                'timestamp': timestamp,
                 'firePerimeter': {
                     'type': 'Feature',
                     'geometry': {
                         'type': 'Polygon',
-                        'coordinates': fire_spread[i]['coordinates']
+                        'coordinates': fire_rings[i:i+1]
                     },
                     'properties': {}
                 },
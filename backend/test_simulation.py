@@ -0,0 +1,118 @@
+from datetime import datetime
+import numpy as np
+import pytest
+from simulation import SimulationConfig, FireSimulation, _DIR_DEGREES, _advance_perimeter, _decode_wind_directions
+
+@pytest.mark.parametrize("direction, degrees", list(_DIR_DEGREES.items()))
+def test_decode_wind_direction(direction, degrees):
+    assert _decode_wind_directions([direction])[0] == degrees
+
+def test_decode_wind_directions_batch():
+    directions = list(_DIR_DEGREES)
+    expected = np.array(list(_DIR_DEGREES.values()), dtype=np.float64)
+    np.testing.assert_array_equal(_decode_wind_directions(directions), expected)
+
+@pytest.mark.parametrize("direction", ["XYZ", "n", "NNEE", "SSWW", "Calm"])
+def test_decode_unknown_wind_direction(direction):
+    with pytest.raises(ValueError):
+        _decode_wind_directions(["N", direction])
+
+def _polygon_area(pts):
+    x, y = pts[:, 0], pts[:, 1]
+    return 0.5 * abs(np.dot(x, np.roll(y, -1)) - np.dot(y, np.roll(x, -1)))
+
+def _simulation(initial_polygon, wind_speed, wind_direction, humidity):
+    config = SimulationConfig(
+        start_location=(-118.15, 34.05),
+        start_time=datetime(2025, 1, 10),
+        initial_polygon=initial_polygon
+    )
+    simulation = FireSimulation(config)
+    simulation.hrrr_data = {
+        "times": [datetime(2025, 1, 10, hour) for hour in range(len(humidity))],
+        "wind_speed": np.asarray(wind_speed, dtype=np.float64),
+        "wind_direction": np.asarray(wind_direction, dtype=np.float64),
+        "temperature": np.full(len(humidity), 60.0),
+        "humidity": np.asarray(humidity, dtype=np.float64)
+    }
+    return simulation
+
+# Clockwise, so the perimeter normals point outward
+SQUARE = [[-118.2, 34.0], [-118.2, 34.1], [-118.1, 34.1], [-118.1, 34.0]]
+
+def test_calculate_fire_spread_keeps_perimeter_when_spread_is_zero():
+    # Humidity of exactly 80% makes base_spread 0
+    perims = _simulation(SQUARE, [5, 5, 5], [90, 90, 90], [20, 80, 20]).calculate_fire_spread()
+    np.testing.assert_array_equal(perims[1], perims[0])
+    assert not np.array_equal(perims[2], perims[1])
+
+def test_calculate_fire_spread_shrinks_perimeter_when_very_humid():
+    # Above 80% humidity the spread distance goes negative and the fire recedes
+    perims = _simulation(SQUARE, [5, 5, 5], [90, 90, 90], [20, 95, 95]).calculate_fire_spread()
+    dry = _simulation(SQUARE, [5, 5, 5], [90, 90, 90], [20, 20, 20]).calculate_fire_spread()
+    assert _polygon_area(dry[1]) > _polygon_area(dry[0])
+    assert _polygon_area(perims[1]) < _polygon_area(perims[0])
+    assert _polygon_area(perims[2]) < _polygon_area(perims[1])
+
+def _reference_advance(points, wind_dir, spread_distance):
+    # Per-vertex perimeter update from the original calculate_fire_spread loop
+    perimeter = []
+    for j, point in enumerate(points):
+        next_point = points[(j + 1) % len(points)]
+        prev_point = points[(j - 1) % len(points)]
+        v1 = np.array([next_point[0] - point[0], next_point[1] - point[1]])
+        v2 = np.array([point[0] - prev_point[0], point[1] - prev_point[1]])
+        v1_norm = np.zeros(2)
+        v2_norm = np.zeros(2)
+        if np.linalg.norm(v1) > 1e-10:
+            v1_norm = v1 / np.linalg.norm(v1)
+        if np.linalg.norm(v2) > 1e-10:
+            v2_norm = v2 / np.linalg.norm(v2)
+        normal = np.array([-v1_norm[1] + -v2_norm[1], v1_norm[0] + v2_norm[0]])
+        if np.linalg.norm(normal) > 1e-10:
+            normal = normal / np.linalg.norm(normal)
+        else:
+            normal = np.array([np.cos(wind_dir), np.sin(wind_dir)])
+        wind_vector = np.array([np.cos(wind_dir), np.sin(wind_dir)])
+        spread_dir = normal * 0.5 + wind_vector * 0.5
+        if np.linalg.norm(spread_dir) > 1e-10:
+            spread_dir = spread_dir / np.linalg.norm(spread_dir)
+        else:
+            spread_dir = wind_vector
+        perimeter.append([
+            point[0] + spread_dir[0] * spread_distance,
+            point[1] + spread_dir[1] * spread_distance
+        ])
+    return np.array(perimeter)
+
+@pytest.mark.parametrize("points", [
+    SQUARE,
+    [[-118.2, 34.0], [-118.2, 34.1], [-118.15, 34.15], [-118.1, 34.1], [-118.1, 34.0], [-118.15, 33.95]],
+    # Repeated vertex, giving a zero-length edge
+    [[-118.2, 34.0], [-118.2, 34.1], [-118.2, 34.1], [-118.1, 34.1], [-118.1, 34.0]],
+    # Single point
+    [[-118.15, 34.05]]
+])
+@pytest.mark.parametrize("wind_dir", [0.0, np.pi / 3, np.pi, 4.5])
+@pytest.mark.parametrize("spread_distance", [0.0016, -0.0008, 0.1])
+def test_advance_perimeter_matches_reference(points, wind_dir, spread_distance):
+    pts = np.asarray(points, dtype=np.float64)
+    out = np.empty_like(pts)
+    _advance_perimeter(pts, np.cos(wind_dir), np.sin(wind_dir), spread_distance, out)
+    np.testing.assert_allclose(out, _reference_advance(points, wind_dir, spread_distance), rtol=0, atol=1e-12)
+
+def test_calculate_fire_spread_seeds_initial_polygon():
+    perims = _simulation(SQUARE, [5, 10, 0, 3], [0, 90, 180, 270], [20, 30, 40, 50]).calculate_fire_spread()
+    assert perims.shape == (4, len(SQUARE), 2)
+    np.testing.assert_array_equal(perims[0], SQUARE)
+    for i in range(1, len(perims)):
+        assert not np.array_equal(perims[i], perims[i - 1])
+
+def test_calculate_fire_spread_from_start_point():
+    # Without an initial polygon the first timestep already spreads from the start point
+    simulation = _simulation(None, [5, 10], [0, 90], [20, 30])
+    perims = simulation.calculate_fire_spread()
+    assert perims.shape == (2, 1, 2)
+    start = np.array([simulation.config.start_location], dtype=np.float64)
+    spread_distance = min(0.002 * (1 + 5 / 5) * (1 + (30 - 20) / 50) * (1 + 5 * 0.2), 0.1)
+    np.testing.assert_allclose(perims[0], _reference_advance(start, 0.0, spread_distance), rtol=0, atol=1e-12)